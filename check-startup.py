@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+
+"""
+Check that dna-multi-match.py starts quickly enough to be called many times from a script.
+The median time of several runs, less the time for Python itself to start, must be within
+the budget for each check. Results are shown on std-out and the exit code is 1 if a check fails.
+
+Give the same --libpath option as used for dna-multi-match.py if needed.
+
+This code is released under the MIT License: https://opensource.org/licenses/MIT
+Copyright (c) 2022 John A. Andrea
+
+No support provided.
+"""
+
+import sys
+import os
+import argparse
+import statistics
+import subprocess
+import time
+
+# milliseconds beyond the startup of Python itself
+BUDGETS = { 'version':35, 'example':45 }
+
+RUNS = 20
+
+
+def get_program_options():
+    results = dict()
+
+    results['libpath'] = None
+    results['runs'] = RUNS
+
+    arg_help = 'Check the startup time of dna-multi-match.py.'
+    parser = argparse.ArgumentParser( description=arg_help )
+
+    arg_help = 'Location of the gedcom library, as given to dna-multi-match.py.'
+    parser.add_argument( '--libpath', type=str, help=arg_help )
+
+    arg_help = 'Number of times to run each check. Default ' + str(results['runs'])
+    parser.add_argument( '--runs', default=results['runs'], type=int, help=arg_help )
+
+    args = parser.parse_args()
+
+    results['libpath'] = args.libpath
+    results['runs'] = args.runs
+
+    return results
+
+
+def time_command( command, runs ):
+    # Return the median time in milliseconds to run the command, or None if it fails.
+    # The first run isn't counted since it might be creating the cached bytecode.
+    env = dict( os.environ )
+    # the check is of a normal run, which does use the cache
+    env.pop( 'PYTHONDONTWRITEBYTECODE', None )
+
+    times = []
+    for i in range( runs + 1 ):
+        start = time.perf_counter()
+        result = subprocess.run( command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL )
+        if result.returncode != 0:
+           return None
+        times.append( time.perf_counter() - start )
+
+    return statistics.median( times[1:] ) * 1000
+
+
+options = get_program_options()
+
+program_dir = os.path.dirname( os.path.realpath( __file__ ) )
+program = os.path.join( program_dir, 'dna-multi-match.py' )
+
+library = []
+if options['libpath'] is not None:
+   library = [ '--libpath', options['libpath'] ]
+
+checks = dict()
+checks['version'] = [ program, '--version' ]
+checks['example'] = [ program, os.path.join( program_dir, 'example-1', 'family.ged' ) ] + library
+checks['example'] += [ '--testers', '1,1000', '11,2000', '21,400' ]
+
+python_time = time_command( [ sys.executable, '-c', 'pass' ], options['runs'] )
+print( 'Python startup', round( python_time, 1 ), 'ms' )
+
+all_ok = True
+for check in checks:
+    check_time = time_command( [ sys.executable ] + checks[check], options['runs'] )
+    if check_time is None:
+       print( 'Check', check, 'failed to run', file=sys.stderr )
+       all_ok = False
+       continue
+
+    extra = check_time - python_time
+    status = 'ok'
+    if extra > BUDGETS[check]:
+       status = 'over budget'
+       all_ok = False
+    print( 'Check', check, round( extra, 1 ), 'ms beyond that, budget', BUDGETS[check], 'ms,', status )
+
+if not all_ok:
+   sys.exit(1)
@@ -0,0 +1,1880 @@
+#!/usr/bin/python3
+
+"""
+Find the intersection of DNA test matches from multiple people.
+Input is a GEDCOM file and a set of people with DNA values
+Output a Graphviz DOT file to std-out
+Output a list of matches to std-err
+
+This code is released under the MIT License: https://opensource.org/licenses/MIT
+Copyright (c) 2022 John A. Andrea
+
+No support provided.
+"""
+
+import sys
+import argparse
+import importlib.util
+import re
+import os
+
+# need to check if these cause trouble with color-blindness
+MATCH_COLOR = 'orange'
+TESTER_COLOR = 'lightblue'
+
+# furthest generation to consider for matching,
+# beyond the largest relationship in the dna ranges
+MAX_GENERATIONS = 12
+
+# compressed input is passed to the gedcom library in pieces of this many bytes
+DECOMPRESS_CHUNK = 1024 * 1024
+
+# change this if the database tables change so that old databases are recreated
+DATABASE_FORMAT = '1'
+
+
+def get_version():
+    return '1.4'
+
+
+def load_my_module( module_name, relative_path ):
+    """
+    Load a module in my own single .py file. Requires Python 3.6+
+    Give the name of the module, not the file name.
+    Give the path to the module relative to the calling program.
+    Requires:
+        import importlib.util
+        import os
+    Use like this:
+        readgedcom = load_my_module( 'readgedcom', '../libs' )
+        data = readgedcom.read_file( input-file )
+    """
+    assert isinstance( module_name, str ), 'Non-string passed as module name'
+    assert isinstance( relative_path, str ), 'Non-string passed as relative path'
+
+    file_path = os.path.dirname( os.path.realpath( __file__ ) )
+    file_path += os.path.sep + relative_path
+    file_path += os.path.sep + module_name + '.py'
+
+    assert os.path.isfile( file_path ), 'Module file not found at ' + str(file_path)
+
+    module_spec = importlib.util.spec_from_file_location( module_name, file_path )
+    my_module = importlib.util.module_from_spec( module_spec )
+    module_spec.loader.exec_module( my_module )
+
+    return my_module
+
+
+def load_gedcom_library( libpath ):
+    # The library is at the given location relative to this program, or beside it by default.
+    # When this program is run from a zipapp bundle which includes the library,
+    # and no location is given, the library is imported from the bundle.
+    if libpath is None:
+       program_dir = os.path.dirname( os.path.realpath( __file__ ) )
+       if os.path.isfile( program_dir ):
+          return importlib.import_module( 'readgedcom' )
+       libpath = '.'
+
+    return load_my_module( 'readgedcom', libpath )
+
+
+def looks_like_int( s ):
+    return re.match( r'\d\d*$', s )
+
+
+def get_program_options():
+    results = dict()
+
+    orientations = [ 'tb', 'lr', 'bt', 'rl' ]
+
+    results['infile'] = None
+    results['testers'] = None
+    results['max-results'] = 14
+    results['min-testers'] = 3
+    results['smallest-match'] = 866 #average 1st cousin
+    results['orientation'] = 'tb'
+    results['id-item'] = 'xref'
+    results['show-each'] = False
+    results['reverse'] = False
+    results['thick'] = 1
+    results['libpath'] = None
+    results['sweep'] = False
+    results['sweep-step'] = 25
+    results['virtual-generations'] = 0
+    results['segments'] = None
+    results['database'] = None
+    results['refresh-database'] = False
+
+    arg_help = 'Display intersection of potential matches from multiple testers.'
+    parser = argparse.ArgumentParser( description=arg_help )
+
+    arg_help = 'At least one match must have a DNA value bigger than this value. Default: ' + str(results['smallest-match'])
+    parser.add_argument( '--smallest-match', default=results['smallest-match'], type=int, help=arg_help )
+
+    arg_help = 'Orientation of the output dot file tb=top-bottom, lt=left-right, etc. Default:' + results['orientation']
+    parser.add_argument( '--orientation', default=results['orientation'], type=str, help=arg_help )
+
+    arg_help = 'Minimum number of needed testers. Default ' + str(results['min-testers'])
+    parser.add_argument( '--min-testers', default=results['min-testers'], type=int, help=arg_help )
+
+    arg_help = 'Maximum number of matches in results. Default ' + str(results['max-results'])
+    parser.add_argument( '--max-results', default=results['max-results'], type=int, help=arg_help )
+
+    arg_help = 'How to find the person in the input. Default is the gedcom id "xref".'
+    arg_help += ' Othewise choose "type.exid", "type.refnum", etc.'
+    parser.add_argument( '--id-item', default=results['id-item'], type=str, help=arg_help )
+
+    arg_help = 'Show matches of each tester to stderr. Might result in a lot of output.'
+    parser.add_argument( '--show-each', default=results['show-each'], action='store_true', help=arg_help )
+
+    # in dot files, change direction of the arrows
+    arg_help = 'For dot file output, reverse the order of the link arrows.'
+    parser.add_argument( '--reverse-arrows', default=results['reverse'], action='store_true', help=arg_help )
+
+    # this option can be repeated for extra thickness
+    arg_help = 'Increase width of connecting lines'
+    parser.add_argument( '--thick', action='count', help=arg_help )
+
+    # maybe this should be changed to have a type which better matched a directory
+    arg_help = 'Location of the gedcom library. Default is the same directory as the program.'
+    parser.add_argument( '--libpath', default=results['libpath'], type=str, help=arg_help )
+
+    arg_help = 'Instead of drawing, show how the intersection changes as each tester steps through their DNA values.'
+    arg_help += ' Each tester may then have several values as v1/v2/v3 or a tolerance as value+-tolerance.'
+    parser.add_argument( '--sweep', default=results['sweep'], action='store_true', help=arg_help )
+
+    arg_help = 'Step in cM across a tester tolerance for the sweep. Default ' + str(results['sweep-step'])
+    parser.add_argument( '--sweep-step', default=results['sweep-step'], type=int, help=arg_help )
+
+    arg_help = 'Add up to this many generations of placeholder ancestors above the top of the tree'
+    arg_help += ' along the testers lines. Default ' + str(results['virtual-generations'])
+    parser.add_argument( '--virtual-generations', default=results['virtual-generations'], type=int, help=arg_help )
+
+    arg_help = 'Set of id,file for testers with a file of shared segments. Each line of a file'
+    arg_help += ' is chromosome,start,end,cM. Only triangulated testers are intersected.'
+    parser.add_argument( '--segments', type=str, nargs='+', help=arg_help )
+
+    arg_help = 'SQLite database file holding the family links and ancestors of the input, for sharing'
+    arg_help += ' between runs. Created from the input if missing or older than the input.'
+    parser.add_argument( '--database', type=str, help=arg_help )
+
+    arg_help = 'Recreate the database from the input even if it appears to be current.'
+    parser.add_argument( '--refresh-database', default=results['refresh-database'], action='store_true', help=arg_help )
+
+    arg_help = 'Set of id,dna-value for each of the testers. Need at least ' + str(results['min-testers'])
+    parser.add_argument( '--testers', type=str, nargs='+', help=arg_help )
+
+    arg_help = 'Show version then exit.'
+    parser.add_argument( '--version', action='version', version=get_version() )
+
+    parser.add_argument('infile', type=argparse.FileType('r') )
+
+    args = parser.parse_args()
+
+    results['testers'] = args.testers
+    results['id-item'] = args.id_item.lower()
+    results['max-results'] = args.max_results
+    results['min-testers'] = args.min_testers
+    results['smallest-match'] = args.smallest_match
+    results['show-each'] = args.show_each
+    results['infile'] = args.infile.name
+    results['reverse'] = args.reverse_arrows
+    results['libpath'] = args.libpath
+    results['sweep'] = args.sweep
+    results['sweep-step'] = args.sweep_step
+    results['virtual-generations'] = args.virtual_generations
+    results['segments'] = args.segments
+    results['database'] = args.database
+    results['refresh-database'] = args.refresh_database
+
+    value = args.thick
+    if value:
+       results['thick'] += value
+
+    # easy to get this one wrong, just drop back to default
+    value = args.orientation.lower()
+    if value in orientations:
+       results['orientation'] = value
+
+    return results
+
+
+def are_options_ok( program_options ):
+    # Error messages will be printed in this routine.
+
+    result = True
+
+    # the set of testers must be id comma dna-match
+    n = 0
+    for tester in program_options['testers']:
+        n += 1
+        err_prefix = 'Tester #' + str(n)
+        show_test = '"' + tester + '"'
+
+        if ',' in tester:
+           parts = tester.split(',')
+           if len( parts ) == 2:
+              values = get_dna_values( parts[1], max( 1, program_options['sweep-step'] ) )
+              if values is None:
+                 print( err_prefix, 'does not have positive integer for dna value:', show_test, file=sys.stderr )
+                 result = False
+              elif len( values ) > 1 and not program_options['sweep']:
+                 print( err_prefix, 'has several dna values, which needs the sweep option:', show_test, file=sys.stderr )
+                 result = False
+              else:
+                 for dna in values:
+                     if not 1 <= dna <= 4000:
+                        print( err_prefix, 'has out of range dna value"', show_test, file=sys.stderr )
+                        result = False
+                        break
+           else:
+              print( err_prefix, 'is not id,dna', show_test, file=sys.stderr )
+              result = False
+        else:
+           print( err_prefix, 'is not id,dna:', show_test, file=sys.stderr )
+           result = False
+
+    expecting = program_options['min-testers']
+    if n < expecting:
+       print( 'Expected', expecting, 'pairs of id,dna for the testers. Found', n, file=sys.stderr )
+       result = False
+
+    if program_options['segments'] is not None:
+       n = 0
+       for segments in program_options['segments']:
+           n += 1
+           err_prefix = 'Segments #' + str(n)
+           show_segments = '"' + segments + '"'
+           parts = segments.split(',')
+           if len( parts ) == 2:
+              if not os.path.isfile( parts[1] ):
+                 print( err_prefix, 'file not found:', show_segments, file=sys.stderr )
+                 result = False
+           else:
+              print( err_prefix, 'is not id,file:', show_segments, file=sys.stderr )
+              result = False
+
+    for item in ['max-results', 'min-testers']:
+        x = program_options[item]
+        if x <= 0:
+           print( 'Option', item, 'must be greater than zero, not', x, file=sys.stderr )
+           result = False
+
+    for item in ['virtual-generations']:
+        x = program_options[item]
+        if x < 0:
+           print( 'Option', item, 'must not be negative, not', x, file=sys.stderr )
+           result = False
+
+    for item in ['smallest-match']:
+        x = program_options[item]
+        if x <= 1:
+           print( 'Option', item, 'must be greater than 1, not', x, file=sys.stderr )
+           result = False
+
+    x = program_options['sweep-step']
+    if x < 1:
+       print( 'Option sweep-step must be greater than zero, not', x, file=sys.stderr )
+       result = False
+
+    if program_options['database'] is not None:
+       if program_options['virtual-generations'] > 0:
+          print( 'Option virtual-generations can not be used with a database', file=sys.stderr )
+          result = False
+    elif program_options['refresh-database']:
+       print( 'Option refresh-database requires the database option', file=sys.stderr )
+       result = False
+
+    x = program_options['id-item']
+    if x in ['name','birt','birth','deat','death']:
+       print( 'id-item not appropriate:', x, file=sys.stderr )
+       result = False
+
+    return result
+
+
+def get_compression( file_name ):
+    # Return the type of compression used for the input file, by file extension,
+    # or None for a plain file.
+    for kind in ['gz', 'bz2', 'xz', 'zip']:
+        if file_name.lower().endswith( '.' + kind ):
+           return kind
+    return None
+
+
+def find_zip_member( file_name ):
+    # Return the name of the GEDCOM file inside a zip archive, or None if there isn't one
+    import zipfile
+
+    try:
+       with zipfile.ZipFile( file_name ) as archive:
+            for member in archive.namelist():
+                if member.lower().endswith( '.ged' ):
+                   return member
+    except zipfile.BadZipFile:
+       pass
+    return None
+
+
+def open_decompressed( file_name, kind, member ):
+    # Return a binary file object producing the uncompressed contents
+    if kind == 'gz':
+       import gzip
+       return gzip.open( file_name, 'rb' )
+    if kind == 'bz2':
+       import bz2
+       return bz2.open( file_name, 'rb' )
+    if kind == 'xz':
+       import lzma
+       return lzma.open( file_name, 'rb' )
+
+    import zipfile
+    # the member stays readable after the archive is closed, until it is closed itself
+    with zipfile.ZipFile( file_name ) as archive:
+         return archive.open( member )
+
+
+def start_decompression( file_name, kind ):
+    # Since the gedcom library reads from a file name, the uncompressed data is given to it
+    # through a named pipe, with the decompression done in a background thread
+    # so that it overlaps with the parsing and nothing is written to disk.
+    # Where named pipes are not available (Windows) a temporary file is used instead.
+    # This relies on the library reading the file once, from start to end.
+    #
+    # Returns the info needed by end_decompression, including the file name
+    # to give to the library, or None if the input can't be used.
+    import tempfile
+    import shutil
+
+    member = None
+    if kind == 'zip':
+       member = find_zip_member( file_name )
+       if member is None:
+          print( 'No readable .ged file found inside', file_name, file=sys.stderr )
+          return None
+
+    results = dict()
+    results['dir'] = tempfile.mkdtemp()
+    results['path'] = os.path.join( results['dir'], 'input.ged' )
+    results['errors'] = []
+
+    def copy_data():
+        # output opened first so that a problem with the input still ends the pipe
+        with open( results['path'], 'wb' ) as outf:
+             with open_decompressed( file_name, kind, member ) as inf:
+                  shutil.copyfileobj( inf, outf, DECOMPRESS_CHUNK )
+
+    def feed_pipe():
+        # Opening the pipe waits until the library opens it,
+        # and closing it at the end of the data is seen as the end of the file.
+        try:
+           copy_data()
+           # the library has it open, so removing the name makes a second read of the
+           # file fail rather than wait forever for data which won't come
+           os.remove( results['path'] )
+        except BrokenPipeError:
+           # otherwise the library's results would be from only part of the file
+           results['errors'].append( 'the gedcom library stopped reading before the end of the input' )
+        except Exception as e:
+           results['errors'].append( str(e) )
+
+    if hasattr( os, 'mkfifo' ):
+       import threading
+       os.mkfifo( results['path'] )
+       results['thread'] = threading.Thread( target=feed_pipe, daemon=True )
+       results['thread'].start()
+    else:
+       copy_data()
+
+    return results
+
+
+def end_decompression( decompression ):
+    # Remove the temporary items and return True if the decompression succeeded.
+    # Errors will be printed in this routine.
+    import shutil
+
+    if 'thread' in decompression:
+       # give the thread a moment to report a problem at the very end of the data
+       thread = decompression['thread']
+       thread.join( 1 )
+       if thread.is_alive():
+          # The library has finished but the thread is still waiting for it to open the pipe
+          # or to read more. Opening and closing the other end makes the thread stop
+          # with an error, which is then reported.
+          try:
+             os.close( os.open( decompression['path'], os.O_RDONLY | os.O_NONBLOCK ) )
+          except OSError:
+             pass
+          thread.join()
+    shutil.rmtree( decompression['dir'], ignore_errors=True )
+    for error in decompression['errors']:
+        print( 'Error in decompressing input:', error, file=sys.stderr )
+    return not decompression['errors']
+
+
+def define_dna_ranges():
+   # values via DNA Painter Shared cM Project
+   # https://dnapainter.com/tools/sharedcmv4
+   #
+   # Note the use of non-gender specific labels
+   # "auncle" = "aunt or uncle"
+   # "nibling" = "niece or nephew"
+
+   results = dict()
+   results['1C'] = {'min':396, 'max':1397, 'ave':866}
+   results['1C1R'] = {'min':102, 'max':980, 'ave':433}
+   results['1C2R'] = {'min':33, 'max':471, 'ave':221}
+   results['1C3R'] = {'min':25, 'max':238, 'ave':117}
+   results['2C'] = {'min':41, 'max':592, 'ave':229}
+   results['2C1R'] = {'min':14, 'max':353, 'ave':122}
+   results['2C2R'] = {'min':0, 'max':244, 'ave':71}
+   results['2C3R'] = {'min':0, 'max':154, 'ave':51}
+   results['3C'] = {'min':0, 'max':234, 'ave':73}
+   results['3C1R'] = {'min':0, 'max':192, 'ave':48}
+   results['3C2R'] = {'min':0, 'max':166, 'ave':36}
+   results['3C3R'] = {'min':0, 'max':98, 'ave':27}
+   results['4C'] = {'min':0, 'max':139, 'ave':35}
+   results['4C1R'] = {'min':0, 'max':126, 'ave':28}
+   results['4C2R'] = {'min':0, 'max':93, 'ave':22}
+   results['4C3R'] = {'min':0, 'max':60, 'ave':19}
+   results['5C'] = {'min':0, 'max':117, 'ave':25}
+   results['5C1R'] = {'min':0, 'max':80, 'ave':21}
+   results['5C2R'] = {'min':0, 'max':65, 'ave':18}
+   results['5C3R'] = {'min':0, 'max':30, 'ave':13}
+   results['6C'] = {'min':0, 'max':71, 'ave':18}
+   results['6C1R'] = {'min':0, 'max':56, 'ave':15}
+   results['6C2R'] = {'min':0, 'max':45, 'ave':13}
+   results['7C'] = {'min':0, 'max':57, 'ave':14}
+   results['7C1R'] = {'min':0, 'max':50, 'ave':12}
+   results['auncle'] = {'min':1201, 'max':2282, 'ave':1741}
+   results['child'] = {'min':2376, 'max':3720, 'ave':3487}
+   results['g-grandauncle'] = {'min':186, 'max':713, 'ave':420}
+   results['g-grandchild'] = {'min':485, 'max':1486, 'ave':887}
+   results['g-grandnibling'] = {'min':186, 'max':713, 'ave':420}
+   results['g-grandparent'] = {'min':485, 'max':1486, 'ave':887}
+   #results['g-grandparents'] = {'min':485, 'max':1486, 'ave':887}
+   results['grandauncle'] = {'min':330, 'max':1467, 'ave':850}
+   results['grandchild'] = {'min':984, 'max':2462, 'ave':1754}
+   results['grandnibling'] = {'min':330, 'max':1467, 'ave':850}
+   results['grandparent'] = {'min':984, 'max':2462, 'ave':1754}
+   #results['grandparents'] = {'min':984, 'max':2462, 'ave':1754}
+   results['half-1C'] = {'min':156, 'max':979, 'ave':449}
+   results['half-1C1R'] = {'min':62, 'max':469, 'ave':224}
+   results['half-1C2R'] = {'min':16, 'max':269, 'ave':125}
+   results['half-1C3R'] = {'min':0, 'max':120, 'ave':60}
+   results['half-2C'] = {'min':10, 'max':325, 'ave':120}
+   results['half-2C1R'] = {'min':0, 'max':190, 'ave':66}
+   results['half-2C2R'] = {'min':0, 'max':144, 'ave':48}
+   results['half-3C'] = {'min':0, 'max':168, 'ave':48}
+   results['half-3C1R'] = {'min':0, 'max':139, 'ave':37}
+   results['half-3C2R'] = {'min':0, 'max':78, 'ave':27}
+   results['half-auncle'] = {'min':492, 'max':1315, 'ave':871}
+   results['half-g-grandauncle'] = {'min':103, 'max':284, 'ave':208}
+   results['half-gg-nibling'] = {'min':103, 'max':284, 'ave':208}
+   results['half-grandauncle'] = {'min':184, 'max':668, 'ave':431}
+   results['half-grandnibling'] = {'min':184, 'max':668, 'ave':431}
+   results['half-nibling'] = {'min':492, 'max':1315, 'ave':871}
+   results['half-sibling'] = {'min':1160, 'max':2436, 'ave':1759}
+   results['nibling'] = {'min':1201, 'max':2282, 'ave':1740}
+   results['parent'] = {'min':2376, 'max':3720, 'ave':3485}
+   #results['parents'] = {'min':2376, 'max':3720, 'ave':3485}
+   results['sibling'] = {'min':1613, 'max':3488, 'ave':2613}
+
+   return results
+
+
+# the table doesn't change, so it is made once when the program is loaded
+DNA_RANGES = define_dna_ranges()
+
+
+def find_relation_label( relation_data ):
+    # return a string of the relationship of "them" to "me"
+    # as "grandparent", "1C", "auncle", etc
+    # given the generation distance to the nearest common ancestor family
+    #
+    # Note the use of non-gender specific labels
+    # "auncle" = "aunt or uncle"
+    # "nibling" = "niece or nephew"
+    #
+    # Note that the labels used here must be the same as in the dna-range setup.
+
+    me = relation_data['gen-me']
+    them = relation_data['gen-them']
+
+    result = 'N/A'
+
+    if them == 0:
+       # direct line
+       if me == 0:
+          result = 'self'
+       elif me == 1:
+          result = 'parent'
+       elif me == 2:
+          result = 'grandparent'
+       else:
+          result = 'g' * (me - 2) + '-grandparent'
+
+    elif me == 0:
+         # direct line
+         if them == 0:
+            result = 'self'
+         elif them == 1:
+            result = 'child'
+         elif them == 2:
+            result = 'grandchild'
+         else:
+            result = 'g' * (them - 2) + '-grandchild'
+
+    elif me == 1:
+         if them == 1:
+            result = 'sibling'  #or half-sibling by checking parents family
+         elif them == 2:
+            result = 'nibling'
+         elif them == 3:
+            result = 'grandnibling'
+         else:
+            result = 'g' * (them - 3) + '-grandnibling'
+
+    elif me == them:
+         if me == 0:
+            result = 'self'
+         elif me == 1:
+            result = 'sibling' #or half-sibling
+         else:
+            result = str(me - 1) + 'C'
+
+    elif them == 1:
+         if me == 2:
+            result = 'auncle'
+         elif me == 3:
+            result = 'grandauncle'
+         else:
+            result = 'g' * (me - 3) + '-grandauncle'
+
+    elif me == 2:
+        result = '1C' + str(them - 2) + 'R'
+
+    elif me > 2:
+         y = abs( them - me )
+         if them < me:
+            # older generation
+            result = str(them - 1) + 'C' + str(y) + 'R'
+         else:
+            # younger generation
+            result = str(me - 1) + 'C' + str(y) + 'R'
+
+    return result
+
+
+def get_name( individual ):
+    """ Return the name for the individual in the passed data section. """
+    name = individual['name'][0]['value']
+    # the standard unknown code is not good for svg output
+    if '?' in name and '[' in name and ']' in name:
+       name = 'unknown'
+    return name.replace( '/', '' ).replace('"','&quot;').replace("'","&rsquo;")
+
+
+def get_names( get_indis, family ):
+    """ Return names of both people in the family, by id """
+    results = dict()
+    for partner in ['husb','wife']:
+        if partner in family:
+           partner_id = family[partner][0]
+           results[partner_id] = get_name( get_indis[partner_id] )
+    return results
+
+
+def make_label( indi_data, people_info ):
+    label = 'DNA matches between'
+    for indi in people_info:
+        label += '\\n' + get_name( indi_data[indi] ) + ' @ ' + str(people_info[indi]) + ' cM'
+    return label
+
+
+def make_dot_id( xref ):
+    return xref.lower().replace('@','').replace('i','').replace('f','').replace('.','')
+
+def make_fam_dot_id( xref ):
+    return 'f' + make_dot_id( str(xref) )
+
+def make_indi_dot_id( xref ):
+    return 'i' + make_dot_id( str(xref) )
+
+
+def start_dot( label, thickness, orientation ):
+    """ Start of the DOT output file """
+    print( 'digraph family {' )
+    print( 'node [shape=record];' )
+    print( 'edge [penwidth=' + str( thickness ) + '];' )
+    print( 'rankdir=' + orientation.upper() + ';' )
+    print( 'labelloc="t";' )
+    print( 'label="' + label + '";' )
+
+
+def end_dot():
+    """ End of the DOT output file """
+    print( '}' )
+
+
+def dot_labels( ged_indis, ged_fams, base_people, people_of_interest, people_in_fams ):
+    def output_label( dot_id, s, extra ):
+        print( dot_id, '[label=' + s.replace("'",'.') + extra + '];' )
+
+    match_style = ',style=filled,color=' + MATCH_COLOR
+    base_style = ',style=filled,color=' + TESTER_COLOR
+
+    # find the families to draw
+    fams_in_use = dict()
+
+    # the parents of the people are always drawn, if they have any
+    for indi in people_of_interest:
+        fam = people_of_interest[indi]
+        if fam is None:
+           continue
+        if fam not in fams_in_use:
+           fams_in_use[fam] = []
+
+    # other families along the paths,
+    # tracking whick ones have a partner which also links to parents
+    for indi in people_in_fams:
+        for from_to in people_in_fams[indi]:
+            for fam_type in ['from','to']:
+                fam = from_to[fam_type]
+                if fam not in fams_in_use:
+                   fams_in_use[fam] = []
+                fams_in_use[fam].append( indi )
+
+    for indi in people_of_interest:
+        # a family person will be added later
+        if indi in people_in_fams:
+           continue
+        # as will a person at the top of the tree who is a partner in a drawn family
+        if people_of_interest[indi] is None:
+           if [fam for fam in ged_indis[indi].get( 'fams', [] ) if fam in fams_in_use]:
+              continue
+        name = get_name( ged_indis[indi] ).strip()
+        with_color = match_style
+        if indi in base_people:
+           with_color = base_style
+        output_label( make_indi_dot_id(indi), '"' + name + '"', with_color )
+
+    for fam in fams_in_use:
+        names = get_names( ged_indis, ged_fams[fam] )
+        extra_info = ''
+        text = ''
+        for indi in names:
+            if indi in people_of_interest:
+               extra_info = match_style
+            if indi in base_people:
+               extra_info = base_style
+            if text:
+               # second parent
+               text += '|<p>|'
+            text += '<' + make_indi_dot_id(indi) + '>' + names[indi].strip()
+        output_label( make_fam_dot_id(fam), '"' + text + '"', extra_info )
+
+
+def dot_connect( reverse, people_of_interest, people_in_fams ):
+    def make_dup_check( one, two ):
+        return str(one) +':'+ str(two)
+
+    # this is a hack
+    # why are doubles produced
+    already_used = []
+
+    for indi in people_of_interest:
+        if people_of_interest[indi] is None:
+           # at the top of the tree, so drawn without a link to parents
+           continue
+        dup_test = make_dup_check( indi, people_of_interest[indi] )
+        if dup_test in already_used:
+           continue
+        already_used.append( dup_test )
+        indi_dot = make_indi_dot_id(indi)
+        fam_dot = make_fam_dot_id(people_of_interest[indi] +':p' )
+        if reverse:
+           print( indi_dot, '->', fam_dot )
+        else:
+           print( fam_dot, '->', indi_dot )
+
+    for indi in people_in_fams:
+        for from_to in people_in_fams[indi]:
+            dup_test = make_dup_check( from_to['from'], from_to['to'] )
+            already_used.append( dup_test )
+            from_fam = make_fam_dot_id( from_to['from'] )
+            to_fam = make_fam_dot_id( from_to['to'] )
+            indi_dot = make_indi_dot_id(indi)
+            if reverse:
+               print( from_fam +':' + indi_dot, '->', to_fam + ':p' )
+            else:
+               print( to_fam + ':p', '->', from_fam +':' + indi_dot )
+
+
+def get_ancestor_families( indi, ged_indis, ged_fams ):
+    # Return the list of ancestor families for the given person as
+    # { fam1:g, fam2:g, fam3:g, ... }
+    # where g is the number of generations from the person to the ancestor family.
+    #
+    # Algorithm note:
+    # each person will be touched multiple times, but the lists are not large.
+
+    results = dict()
+
+    key = 'famc'
+    if key in ged_indis[indi]:
+       fam = ged_indis[indi][key][0]
+
+       results[fam] = 1
+
+       for parent in ['husb','wife']:
+           if parent in ged_fams[fam]:
+              parent_id = ged_fams[fam][parent][0]
+
+              parent_ancestors = get_ancestor_families( parent_id, ged_indis, ged_fams )
+
+              for ancestor_fam in parent_ancestors:
+                  results[ancestor_fam] = parent_ancestors[ancestor_fam] + 1
+
+    return results
+
+
+def find_tree_tops( indi, ged_indis, ged_fams ):
+    # Return the people at the top of the tree above the given person as
+    # { top1:g, top2:g, ... }
+    # where g is the fewest generations from the person up to that top person.
+    # The person is their own top if they have no parents family.
+
+    results = dict()
+
+    key = 'famc'
+    if key in ged_indis[indi]:
+       fam = ged_indis[indi][key][0]
+       for parent in ['husb','wife']:
+           if parent in ged_fams[fam]:
+              parent_id = ged_fams[fam][parent][0]
+              parent_tops = find_tree_tops( parent_id, ged_indis, ged_fams )
+              for top in parent_tops:
+                  gen = parent_tops[top] + 1
+                  if top not in results or gen < results[top]:
+                     results[top] = gen
+    else:
+       results[indi] = 0
+
+    return results
+
+
+def find_possible_generations( dna_value, dna_ranges ):
+    # Return the set of (gen-me,gen-them) pairs for which the relationship
+    # has a DNA range containing the value. This sets the limit on how far away
+    # a match could be.
+    results = set()
+    for me in range( MAX_GENERATIONS + 1 ):
+        for them in range( MAX_GENERATIONS + 1 ):
+            relation = find_relation_label( {'gen-me':me, 'gen-them':them} )
+            if relation in dna_ranges:
+               if dna_ranges[relation]['min'] <= dna_value <= dna_ranges[relation]['max']:
+                  results.add( (me, them) )
+    return results
+
+
+def add_virtual_generations( n_generations, tester_values, dna_ranges, ged_indis, ged_fams ):
+    # Add placeholder ancestors above the people at the top of the tree
+    # so that matches through unknown ancestors can be found.
+    #
+    # Only the tops above the testers are extended, with a single line of ancestors
+    # per top person rather than a full doubling of parents each generation.
+    # Each placeholder ancestor family also gets a line of placeholder descendants
+    # to stand in for the unknown cousins. The number of generations created is limited
+    # to the distances which any of a tester's DNA values could match.
+    #
+    # The placeholders are created up front, before the ancestor pass, rather than
+    # on demand while the testers are handled. That way the rest of the program treats
+    # them as ordinary people. The cost is that every real descendant of an extended
+    # top person also carries the placeholder families in their ancestor list, but that
+    # is at most one extra family per virtual generation, which the depth limit keeps small.
+    # The tester values are given as { indi:[dna1, dna2, ...], ... }
+    #
+    # Returns the number of placeholder people added.
+
+    n_people = [0]
+    n_fams = [0]
+
+    def new_person( name ):
+        n_people[0] += 1
+        indi = '@VI' + str(n_people[0]) + '@'
+        ged_indis[indi] = { 'xref':'V' + str(n_people[0]), 'name':[{'value':name}] }
+        return indi
+
+    def new_family( partner, child ):
+        n_fams[0] += 1
+        fam = '@VF' + str(n_fams[0]) + '@'
+        ged_fams[fam] = { 'xref':'V' + str(n_fams[0]), 'husb':[partner], 'chil':[child] }
+        ged_indis[partner]['fams'] = [fam]
+        ged_indis[child]['famc'] = [fam]
+        return fam
+
+    # for each top person, how many generations are needed above them
+    # and how many descendant generations are needed below each of those
+    needed = dict()
+    for indi in tester_values:
+        possible = set()
+        for dna_value in tester_values[indi]:
+            possible |= find_possible_generations( dna_value, dna_ranges )
+        tops = find_tree_tops( indi, ged_indis, ged_fams )
+        for top in tops:
+            if top not in needed:
+               needed[top] = dict()
+            for gen_up in range( 1, n_generations + 1 ):
+                gen_me = tops[top] + gen_up
+                for pair in possible:
+                    if pair[0] == gen_me:
+                       needed[top][gen_up] = max( needed[top].get( gen_up, 0 ), pair[1] )
+
+    for top in needed:
+        if not needed[top]:
+           continue
+        top_name = get_name( ged_indis[top] )
+        child = top
+        for gen_up in range( 1, max( needed[top] ) + 1 ):
+            ancestor = new_person( 'Virtual ancestor ' + str(gen_up) + ' above ' + top_name )
+            fam = new_family( ancestor, child )
+
+            # a line of unknown cousins below this ancestor
+            relative = None
+            for gen_down in range( 1, needed[top].get( gen_up, 0 ) + 1 ):
+                name = 'Virtual relative ' + str(gen_down) + ' below ancestor ' + str(gen_up) + ' above ' + top_name
+                parent = relative
+                relative = new_person( name )
+                if parent is None:
+                   ged_fams[fam]['chil'].append( relative )
+                   ged_indis[relative]['famc'] = [fam]
+                else:
+                   new_family( parent, relative )
+
+            child = ancestor
+
+    return n_people[0]
+
+
+def find_relation( me, them, everyones_ancestor_fams, ged_indis ):
+    # Return how "them" is related to "me" via the nearest common ancestor family
+    # { 'closest': closest-family-id,
+    #   'gen-me': generations-from-me-to-closest-family,
+    #   'gen-them': generations-from-them-to-closest-family }
+    # or None if they are not blood relatives.
+    #
+    # If them is a parent gen-me -> 1, gen-them -> 0
+    # i.e. generations from them to themselves is zero.
+    # If them is a grandparent gen-me -> 2, gen-them -> 0
+    #
+    # Each check looks only at the ancestor families of the two people,
+    # not at the rest of the tree.
+
+    if me == them:
+       return None
+
+    my_gens = everyones_ancestor_fams[me]
+    their_gens = everyones_ancestor_fams[them]
+
+    # them is a direct ancestor, closest generation first
+    closest = None
+    for fam in ged_indis[them].get( 'fams', [] ):
+        if fam in my_gens:
+           if closest is None or my_gens[fam] < my_gens[closest]:
+              closest = fam
+    if closest is not None:
+       return { 'closest':closest, 'gen-me':my_gens[closest], 'gen-them':0 }
+
+    # them is a descendant
+    for fam in ged_indis[me].get( 'fams', [] ):
+        if fam in their_gens:
+           if closest is None or their_gens[fam] < their_gens[closest]:
+              closest = fam
+    if closest is not None:
+       return { 'closest':closest, 'gen-me':0, 'gen-them':their_gens[closest] }
+
+    # shared ancestors, closest generation to me first
+    # checking the shorter list against the longer one
+    fewer, more = my_gens, their_gens
+    if len( their_gens ) < len( my_gens ):
+       fewer, more = their_gens, my_gens
+    best = None
+    for fam in fewer:
+        if fam in more:
+           distance = ( my_gens[fam], their_gens[fam] )
+           if best is None or distance < best:
+              best = distance
+              closest = fam
+    if closest is not None:
+       return { 'closest':closest, 'gen-me':best[0], 'gen-them':best[1] }
+
+    return None
+
+
+def find_ids_of_testers( tag, testers, individuals, convert=int, option_label='Tester' ):
+    # Return { indi:value, ... } with the value after the comma passed through convert.
+    # The option label is used in error messages to say which option has the problem.
+    # testers with id problems will not to be added to the list.
+    # The calling routine ought to check that all are present in order to continue.
+    # Errors will be printed in this routine.
+    results = dict()
+    n = 0
+    for test in testers:
+        n += 1
+        found_id = None
+        id_ok = True
+        err_prefix = option_label + ' #' + str(n)
+        show_test = '"' + test + '"'
+
+        parts = test.split(',')
+
+        n_found = 0
+
+        if tag == 'xref':
+           # maybe the user has given the full id "@Ix@" or just the number
+           # so reduce it to just the number
+           wanted = parts[0].replace('@','').replace('I','').replace('i','')
+           if looks_like_int( wanted ):
+              wanted = int( wanted )
+              # search using the xref key because that's more future-proof than the main id key
+              for indi in individuals:
+                  if individuals[indi]['xref'] == wanted:
+                     found_id = indi
+                     n_found += 1
+
+           else:
+              id_ok = False
+              print( err_prefix, 'id isn\'t an xref number:', show_test, file=sys.stderr )
+
+        elif tag.startswith( 'type.' ):
+           subtag = tag.replace( 'type.', '' )
+           for indi in individuals:
+               if 'even' in individuals[indi]:
+                  for event in individuals[indi]['even']:
+                      if 'type' in event and event['type'] == subtag:
+                         if event['value'] == parts[0]:
+                            found_id = indi
+                            n_found += 1
+
+        else:
+           # Its a top level tag of some sort, maybe even uuid
+           # abort if its not a simple value
+           for indi in individuals:
+               if tag in individuals[indi]:
+
+                  if isinstance( individuals[indi][tag], str ):
+                     if individuals[indi][tag] == parts[0]:
+                        found_id = indi
+                        n_found += 1
+
+                  elif isinstance( individuals[indi][tag], list ):
+                     for value in individuals[indi][tag]:
+                         # also check for appropriate type, but not reporting
+                         if isinstance( value, str ):
+                            if value == parts[0]:
+                               found_id = indi
+                               n_found += 1
+
+                  else:
+                     print( 'id-item not appropriate for locating individuals.', file=sys.stderr )
+                     print( 'Program exiting', file=sys.stderr )
+                     sys.exit(1)
+
+        if n_found == 0:
+           if id_ok:
+              print( err_prefix, 'not located in the GEDCOM:', show_test, file=sys.stderr )
+        elif n_found == 1:
+           if found_id in results:
+              print( err_prefix, 'is the same person as an earlier entry', show_test, file=sys.stderr )
+           else:
+              results[found_id] = convert( parts[1] )
+        else:
+           print( err_prefix, 'more than one individual', show_test, file=sys.stderr )
+
+    return results
+
+
+def find_blood_related( indi, everyones_ancestor_fams, ged_indis ):
+    # Return a dict with each blood relative
+    # [blood-relative-id] = { 'closest': closest-family-id, 'gen-me': ..., 'gen-them': ... }
+    # as described in find_relation
+    results = dict()
+    for them in everyones_ancestor_fams:
+        relation = find_relation( indi, them, everyones_ancestor_fams, ged_indis )
+        if relation is not None:
+           results[them] = relation
+    return results
+
+
+def check_testers( testers, everyones_ancestor_fams, ged_indis, show_each ):
+    # Look at how the testers are related to each other.
+    # Warnings are printed for unexpected combinations,
+    # but they don't stop the program since the tree might be incomplete.
+    for indi in testers:
+        for other in testers:
+            if other == indi:
+               continue
+            relation = find_relation( indi, other, everyones_ancestor_fams, ged_indis )
+            if relation is None:
+               if show_each:
+                  print( person_info(other), 'is not blood related to', person_info(indi), file=sys.stderr )
+               continue
+            if show_each:
+               print( person_info(other), 'is', find_relation_label( relation ), 'of', person_info(indi), file=sys.stderr )
+            if relation['gen-them'] == 0 and testers[indi] > testers[other]:
+               # a descendant inherits only a portion of the DNA of an ancestor
+               print( 'Warning:', person_info(indi), 'has a larger DNA value than their ancestor',
+                      person_info(other), file=sys.stderr )
+               print( '   so the match might not be through that ancestor.', file=sys.stderr )
+
+
+def person_info( indi ):
+    return get_name( data[i_key][indi] ) + ' (xref ' + str(data[i_key][indi]['xref']) + ')'
+
+
+def group_by_relation( relatives ):
+    # Return the blood relatives grouped by their relationship label as
+    # { label1:[id1, id2, ...], label2:[id3, ...], ... }
+    # so that a DNA value needs to be checked once per label rather than once per person.
+    results = dict()
+    for other in relatives:
+        relation = relatives[other]['label']
+        if relation not in results:
+           results[relation] = []
+        results[relation].append( other )
+    return results
+
+
+def find_within_range( relatives_by_label, dna_value, dna_ranges ):
+    results = []
+    for relation in relatives_by_label:
+        if relation in dna_ranges:
+           if dna_ranges[relation]['min'] <= dna_value <= dna_ranges[relation]['max']:
+              results.extend( relatives_by_label[relation] )
+    return results
+
+
+def get_dna_values( value, step ):
+    # Return the list of DNA values given for a tester as one of
+    #   value
+    #   value1/value2/value3
+    #   value+-tolerance (or value±tolerance) from value-tolerance to value+tolerance in steps
+    # or None if the value is not one of those forms.
+    for separator in ['+-', '±']:
+        if separator in value:
+           parts = value.split( separator )
+           if len( parts ) == 2 and looks_like_int( parts[0] ) and looks_like_int( parts[1] ):
+              middle = int( parts[0] )
+              tolerance = int( parts[1] )
+              results = set()
+              for offset in range( 0, tolerance + 1, step ):
+                  results.add( middle - offset )
+                  results.add( middle + offset )
+              results.add( middle - tolerance )
+              results.add( middle + tolerance )
+              # a tolerance can't take the value outside the possible matches
+              return sorted( [x for x in results if 1 <= x <= 4000 or x == middle] )
+           return None
+
+    results = []
+    for part in value.split( '/' ):
+        if not looks_like_int( part ):
+           return None
+        results.append( int( part ) )
+    return results
+
+
+def read_segments( file_name ):
+    # Return a list of shared segments from a csv file as
+    # [ (chromosome, start, end, cm), ... ]
+    # Lines which don't have numeric values, such as a header, are skipped.
+    # Returns None if a segment doesn't start before it ends.
+    # Errors will be printed in this routine.
+    import csv
+
+    results = []
+    ok = True
+    with open( file_name, newline='' ) as inf:
+         for row in csv.reader( inf ):
+             if len( row ) < 4:
+                continue
+             chromosome = row[0].strip().lower().replace( 'chr', '' )
+             start = row[1].strip()
+             end = row[2].strip()
+             if looks_like_int( start ) and looks_like_int( end ):
+                try:
+                   cm = float( row[3] )
+                except ValueError:
+                   continue
+                if int( start ) >= int( end ):
+                   print( 'Segment does not start before it ends in', file_name, ':', ','.join( row ), file=sys.stderr )
+                   ok = False
+                   continue
+                results.append( (chromosome, int( start ), int( end ), cm) )
+
+    if not ok:
+       return None
+    return results
+
+
+def find_triangulated_groups( tester_segments ):
+    # Return the sets of testers who share an overlapping segment, as
+    # { frozenset(testers):[ (chromosome, start, end), ... ], ... }
+    # with the regions where each set overlaps.
+    #
+    # Rather than comparing every pair of segments, the segment ends are sorted
+    # and swept along each chromosome keeping count of who is currently inside a segment.
+    # A set is saved each time a segment closes right after others have opened,
+    # which gives the largest overlapping set at that point.
+
+    events = dict()
+    for indi in tester_segments:
+        for segment in tester_segments[indi]:
+            chromosome = segment[0]
+            if chromosome not in events:
+               events[chromosome] = []
+            # ends sort ahead of starts at the same position so touching segments don't overlap
+            events[chromosome].append( (segment[1], 1, indi) )
+            events[chromosome].append( (segment[2], 0, indi) )
+
+    results = dict()
+    for chromosome in events:
+        inside = dict()
+        opened = None
+        for position, is_start, indi in sorted( events[chromosome], key=lambda event: event[:2] ):
+            if is_start:
+               inside[indi] = inside.get( indi, 0 ) + 1
+               opened = position
+            else:
+               if opened is not None:
+                  group = frozenset( inside )
+                  if len( group ) > 1:
+                     if group not in results:
+                        results[group] = []
+                     results[group].append( (chromosome, opened, position) )
+                  opened = None
+               inside[indi] -= 1
+               if inside[indi] == 0:
+                  del inside[indi]
+
+    return results
+
+
+def find_tester_groups( tester_values, tester_segments, min_testers ):
+    # Return the list of tester sets which should share a common ancestor.
+    # Testers without segment files can't be excluded so they belong to every set.
+    # Without any segments that is all the testers together.
+
+    if not tester_segments:
+       return [ list( tester_values ) ]
+
+    without_segments = [indi for indi in tester_values if indi not in tester_segments]
+
+    results = []
+    groups = find_triangulated_groups( tester_segments )
+    for group in groups:
+        testers_in_group = [indi for indi in tester_values if indi in group] + without_segments
+        if len( testers_in_group ) >= min_testers:
+           if testers_in_group not in results:
+              results.append( testers_in_group )
+    return results
+
+
+def intersect_groups( within_range, tester_groups ):
+    # Return the people in the intersection of matches for any of the groups of testers
+    results = []
+    for group in tester_groups:
+        group_matches = readgedcom.list_intersection( *[within_range[indi] for indi in group] )
+        for indi in group_matches:
+            if indi not in results:
+               results.append( indi )
+    return results
+
+
+def show_sweep( tester_values, tester_groups, relatives_by_label, dna_ranges ):
+    # For each tester with several DNA values, step through those values
+    # while the other testers stay at their middle value,
+    # showing the intersection and the changes from the previous value.
+    # That keeps the sweep to one intersection per value, rather than one for every
+    # combination of all the testers values.
+
+    middle_range = dict()
+    for indi in tester_values:
+        middle_value = tester_values[indi][len( tester_values[indi] ) // 2]
+        middle_range[indi] = find_within_range( relatives_by_label[indi], middle_value, dna_ranges )
+
+    for indi in tester_values:
+        if len( tester_values[indi] ) < 2:
+           continue
+
+        print( 'Sweep of', person_info(indi), file=sys.stderr )
+        within_range = dict( middle_range )
+        previous = []
+        for dna_value in tester_values[indi]:
+            within_range[indi] = find_within_range( relatives_by_label[indi], dna_value, dna_ranges )
+
+            matches = intersect_groups( within_range, tester_groups )
+
+            print( '   ', dna_value, 'cM has', len( matches ), 'people', file=sys.stderr )
+            for other in matches:
+                if other not in previous:
+                   print( '       +', person_info(other), file=sys.stderr )
+            for other in previous:
+                if other not in matches:
+                   print( '       -', person_info(other), file=sys.stderr )
+
+            previous = matches
+        print( '', file=sys.stderr )
+
+
+def read_gedcom( file_name ):
+    compression = get_compression( file_name )
+    if compression:
+       decompression = start_decompression( file_name, compression )
+       if decompression is None:
+          sys.exit(1)
+       # clean up the temporary items even if the library fails
+       try:
+          results = readgedcom.read_file( decompression['path'] )
+       finally:
+          decompression_ok = end_decompression( decompression )
+       if not decompression_ok:
+          sys.exit(1)
+    else:
+       results = readgedcom.read_file( file_name )
+    return results
+
+
+def get_source_info( file_name ):
+    # Return what is saved in the database to tell if the input file has changed
+    info = os.stat( file_name )
+    results = dict()
+    results['format'] = DATABASE_FORMAT
+    results['source'] = os.path.realpath( file_name )
+    results['size'] = str( info.st_size )
+    results['modified'] = str( info.st_mtime_ns )
+    return results
+
+
+def connect_database( file_name ):
+    # The database is only read after it has been created,
+    # so many copies of the program can share it.
+    import sqlite3
+    import urllib.parse
+
+    uri = 'file:' + urllib.parse.quote( os.path.realpath( file_name ) ) + '?mode=ro'
+    return sqlite3.connect( uri, uri=True )
+
+
+def is_database_current( db_file, source_file ):
+    if not os.path.isfile( db_file ):
+       return False
+
+    import sqlite3
+
+    try:
+       db = connect_database( db_file )
+       saved = dict( db.execute( 'select key, value from meta' ).fetchall() )
+       db.close()
+    except sqlite3.Error:
+       return False
+
+    return saved == get_source_info( source_file )
+
+
+def lock_database( db_file, wait ):
+    # Take the lock file which allows only one copy of the program to rebuild the database.
+    # If another copy has it then either wait for it or return None.
+    #
+    # Where file locks are available the lock is released by the system if the program
+    # stops, otherwise the lock is a file which exists only while it is held.
+    lock_file = db_file + '.lock'
+
+    try:
+       import fcntl
+    except ImportError:
+       fcntl = None
+
+    if fcntl:
+       handle = open( lock_file, 'a' )
+       try:
+          fcntl.flock( handle, fcntl.LOCK_EX | fcntl.LOCK_NB )
+       except BlockingIOError:
+          if not wait:
+             handle.close()
+             return None
+          print( 'Waiting for another run to rebuild the database', file=sys.stderr )
+          fcntl.flock( handle, fcntl.LOCK_EX )
+       return { 'file':lock_file, 'handle':handle }
+
+    import time
+
+    waiting = False
+    while True:
+        try:
+           handle = os.open( lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY )
+           return { 'file':lock_file, 'handle':handle }
+        except FileExistsError:
+           if not wait:
+              return None
+           if not waiting:
+              print( 'Waiting for another run to rebuild the database', file=sys.stderr )
+              print( 'If no other run is active, delete', lock_file, file=sys.stderr )
+              waiting = True
+           time.sleep( 1 )
+
+
+def unlock_database( lock ):
+    if isinstance( lock['handle'], int ):
+       os.close( lock['handle'] )
+       os.remove( lock['file'] )
+    else:
+       # removing the file here would let another copy lock a different file
+       lock['handle'].close()
+
+
+def get_id_items( individual ):
+    # Return the (item,value) pairs by which a person might be found, for the
+    # same choices as the id-item option: xref, type.something, or a top level tag
+    results = [ ('xref', str(individual['xref'])) ]
+    for tag in individual:
+        if tag in ['xref','name','famc','fams']:
+           continue
+        if tag == 'even':
+           for event in individual[tag]:
+               if 'type' in event and isinstance( event.get('value'), str ):
+                  results.append( ('type.' + event['type'], event['value']) )
+        elif isinstance( individual[tag], str ):
+           results.append( (tag, individual[tag]) )
+        elif isinstance( individual[tag], list ):
+           for value in individual[tag]:
+               if isinstance( value, str ):
+                  results.append( (tag, value) )
+    return results
+
+
+def import_database( db_file, source_file, ged_indis, ged_fams ):
+    # Create the database from the parsed gedcom data.
+    #
+    # The closure table has a row for each person and each of their ancestor families
+    # with the number of generations up to that family. Each person also gets a row
+    # with zero generations for the families in which they are a partner. That way
+    # any two people sharing a family in the table are blood relatives (or partners
+    # if both are at zero) and the family with the smallest distances is the closest.
+    #
+    # The new database is built beside the old one, then moved into place
+    # so that anyone reading the old one isn't disturbed.
+    import sqlite3
+    import tempfile
+
+    def first( record, key ):
+        if key in record:
+           return record[key][0]
+        return None
+
+    def get_name_value( individual ):
+        if 'name' in individual:
+           return individual['name'][0]['value']
+        return None
+
+    def closure_rows():
+        for indi in ged_indis:
+            ancestors = get_ancestor_families( indi, ged_indis, ged_fams )
+            for fam in ancestors:
+                yield ( indi, fam, ancestors[fam] )
+            for fam in ged_indis[indi].get( 'fams', [] ):
+                yield ( indi, fam, 0 )
+
+    db_dir = os.path.dirname( os.path.realpath( db_file ) )
+    handle, temp_file = tempfile.mkstemp( dir=db_dir, suffix='.tmp' )
+    os.close( handle )
+
+    try:
+       db = sqlite3.connect( temp_file )
+       try:
+          db.execute( 'pragma journal_mode=off' )
+          db.execute( 'pragma synchronous=off' )
+
+          db.execute( 'create table meta( key text primary key, value text )' )
+          db.execute( 'create table indi( id text primary key, xref, name text, famc text )' )
+          db.execute( 'create table indi_fams( indi text, fam text )' )
+          db.execute( 'create table fam( id text primary key, husb text, wife text )' )
+          db.execute( 'create table ident( item text, value text, indi text )' )
+          db.execute( 'create table closure( indi text, fam text, gen integer )' )
+
+          with db:
+               db.executemany( 'insert into meta values (?,?)', get_source_info( source_file ).items() )
+               db.executemany( 'insert into indi values (?,?,?,?)',
+                               ( (indi, ged_indis[indi]['xref'], get_name_value( ged_indis[indi] ),
+                                  first( ged_indis[indi], 'famc' )) for indi in ged_indis ) )
+               db.executemany( 'insert into indi_fams values (?,?)',
+                               ( (indi, fam) for indi in ged_indis for fam in ged_indis[indi].get( 'fams', [] ) ) )
+               db.executemany( 'insert into fam values (?,?,?)',
+                               ( (fam, first( ged_fams[fam], 'husb' ), first( ged_fams[fam], 'wife' )) for fam in ged_fams ) )
+               db.executemany( 'insert into ident values (?,?,?)',
+                               ( (item, value, indi) for indi in ged_indis for item, value in get_id_items( ged_indis[indi] ) ) )
+               db.executemany( 'insert into closure values (?,?,?)', closure_rows() )
+
+               # indexes are faster to create after the bulk load
+               db.execute( 'create index indi_fams_by_indi on indi_fams( indi )' )
+               db.execute( 'create index ident_by_value on ident( item, value )' )
+               db.execute( 'create index closure_by_indi on closure( indi, gen )' )
+               db.execute( 'create index closure_by_fam on closure( fam, indi, gen )' )
+       finally:
+          db.close()
+
+       # the temporary file is private, so give it the same read permissions as the input
+       # so that everyone who can read the input can share the database
+       os.chmod( temp_file, os.stat( source_file ).st_mode & 0o666 )
+       os.replace( temp_file, db_file )
+
+    finally:
+       # only still there if something failed
+       if os.path.exists( temp_file ):
+          os.remove( temp_file )
+
+
+def open_database( db_file, dna_ranges ):
+    # Open for reading, with temporary tables for this run's testers and their relatives
+    db = connect_database( db_file )
+
+    db.create_function( 'relation_label', 2,
+                        lambda me, them: find_relation_label( {'gen-me':me, 'gen-them':them} ) )
+
+    db.execute( 'create temp table dna_range( label text primary key, min integer, max integer )' )
+    db.execute( 'create temp table tester_value( indi text primary key, dna integer )' )
+    db.execute( 'create temp table relative( tester text, indi text, closest text, gen_me integer, gen_them integer, label text )' )
+    db.execute( 'create index temp.relative_by_tester on relative( tester, label )' )
+
+    db.executemany( 'insert into temp.dna_range values (?,?,?)',
+                    ( (label, dna_ranges[label]['min'], dna_ranges[label]['max']) for label in dna_ranges ) )
+
+    return db
+
+
+def db_find_candidates( db, tag, testers ):
+    # Return the people who might be the testers, in the same form as the gedcom
+    # individuals but with only the id item, ready for find_ids_of_testers
+    results = dict()
+    for test in testers:
+        wanted = test.split(',')[0]
+        if tag == 'xref':
+           wanted = wanted.replace('@','').replace('I','').replace('i','')
+           if looks_like_int( wanted ):
+              wanted = str( int( wanted ) )
+
+        query = 'select ident.indi, indi.xref from ident join indi on indi.id = ident.indi'
+        query += ' where ident.item = ? and ident.value = ?'
+        for indi, xref in db.execute( query, (tag, wanted) ):
+            if indi not in results:
+               results[indi] = { 'xref':xref }
+            if tag.startswith( 'type.' ):
+               if 'even' not in results[indi]:
+                  results[indi]['even'] = []
+               results[indi]['even'].append( { 'type':tag.replace( 'type.', '' ), 'value':wanted } )
+            elif tag != 'xref':
+               if tag not in results[indi]:
+                  results[indi][tag] = []
+               results[indi][tag].append( wanted )
+
+    return results
+
+
+def db_load_people( db, people, data ):
+    # Add the gedcom details of these people to the data, unless already there
+    for indi in people:
+        if indi in data[i_key]:
+           continue
+        xref, name, famc = db.execute( 'select xref, name, famc from indi where id = ?', (indi,) ).fetchone()
+        individual = { 'xref':xref }
+        if name is not None:
+           individual['name'] = [ {'value':name} ]
+        if famc is not None:
+           individual['famc'] = [ famc ]
+        fams = [row[0] for row in db.execute( 'select fam from indi_fams where indi = ?', (indi,) )]
+        if fams:
+           individual['fams'] = fams
+        data[i_key][indi] = individual
+
+
+def db_load_families( db, fams, data ):
+    for fam in fams:
+        if fam in data[f_key]:
+           continue
+        husb, wife = db.execute( 'select husb, wife from fam where id = ?', (fam,) ).fetchone()
+        family = dict()
+        if husb is not None:
+           family['husb'] = [ husb ]
+        if wife is not None:
+           family['wife'] = [ wife ]
+        data[f_key][fam] = family
+
+
+def db_load_ancestor_families( db, people, ancestor_fams ):
+    # Same as get_ancestor_families for each of the people, but from the closure table
+    for indi in people:
+        if indi not in ancestor_fams:
+           query = 'select fam, gen from closure where indi = ? and gen > 0'
+           ancestor_fams[indi] = dict( db.execute( query, (indi,) ).fetchall() )
+
+
+def db_load_for_drawing( db, people, data, ancestor_fams ):
+    # Load what is needed to draw the paths from the people up to their shared ancestors:
+    # the ancestor families and the partners in those families
+    db_load_people( db, people, data )
+    db_load_ancestor_families( db, people, ancestor_fams )
+
+    fams = dict()
+    for indi in people:
+        for fam in ancestor_fams[indi]:
+            fams[fam] = True
+    db_load_families( db, fams, data )
+
+    partners = []
+    for fam in fams:
+        for partner in ['husb','wife']:
+            if partner in data[f_key][fam]:
+               partners.append( data[f_key][fam][partner][0] )
+    db_load_people( db, partners, data )
+    db_load_ancestor_families( db, partners, ancestor_fams )
+
+
+def db_find_blood_related( db, indi ):
+    # Same as find_blood_related, but as a query over the closure table.
+    # The relatives are kept in a temporary table for the range queries.
+    #
+    # For each relative the shared family with the smallest distance is the closest,
+    # preferring the smallest distance from the tester. The other values in the row
+    # come from that same row of the minimum, as sqlite allows.
+    #
+    # The relatives are stored in the order of the tree, as in the gedcom file,
+    # so that the results come out in the same order as without the database.
+
+    nearest = 'select them.indi as indi, them.fam as fam, me.gen as gen_me, them.gen as gen_them,'
+    nearest += ' min( me.gen * 1000 + them.gen )'
+    nearest += ' from closure as me join closure as them on them.fam = me.fam'
+    nearest += ' where me.indi = ? and them.indi <> me.indi and ( me.gen > 0 or them.gen > 0 )'
+    nearest += ' group by them.indi'
+
+    query = 'insert into temp.relative( tester, indi, closest, gen_me, gen_them )'
+    query += ' select ?, nearest.indi, nearest.fam, nearest.gen_me, nearest.gen_them'
+    query += ' from (' + nearest + ') as nearest join indi on indi.id = nearest.indi'
+    query += ' order by indi.rowid'
+
+    db.execute( 'delete from temp.relative where tester = ?', (indi,) )
+    db.execute( query, (indi, indi) )
+    db.execute( 'update temp.relative set label = relation_label( gen_me, gen_them ) where tester = ?', (indi,) )
+
+    results = dict()
+    query = 'select indi, closest, gen_me, gen_them, label from temp.relative where tester = ? order by rowid'
+    for other, closest, gen_me, gen_them, label in db.execute( query, (indi,) ):
+        results[other] = { 'closest':closest, 'gen-me':gen_me, 'gen-them':gen_them, 'label':label }
+    return results
+
+
+def db_label_order( tester ):
+    # Subquery giving the position of each relationship label of the tester
+    # as the first of their relatives with that label, which is the order
+    # that group_by_relation makes
+    query = '( select label, min( rowid ) as first from temp.relative'
+    query += ' where tester = ' + tester + ' group by label )'
+    return query
+
+
+def db_find_within_range( db, indi, dna_value ):
+    # Same as find_within_range, in the same order: grouped by relationship then in tree order
+    query = 'select relative.indi from temp.relative join temp.dna_range on dna_range.label = relative.label'
+    query += ' join ' + db_label_order( '?' ) + ' as label_order on label_order.label = relative.label'
+    query += ' where relative.tester = ? and ? between dna_range.min and dna_range.max'
+    query += ' order by label_order.first, relative.rowid'
+    return [row[0] for row in db.execute( query, (indi, indi, dna_value) )]
+
+
+def db_intersect_groups( db, tester_values, tester_groups ):
+    # Same as intersect_groups, as a query of the relatives within range for all the testers in each group.
+    # Like list_intersection the matches of a group are in the order of its first tester's list.
+    db.execute( 'delete from temp.tester_value' )
+    db.executemany( 'insert into temp.tester_value values (?,?)', tester_values.items() )
+
+    results = []
+    for group in tester_groups:
+        query = 'select relative.indi from temp.relative'
+        query += ' join temp.dna_range on dna_range.label = relative.label'
+        query += ' join temp.tester_value on tester_value.indi = relative.tester'
+        query += ' join temp.relative as lead on lead.tester = ? and lead.indi = relative.indi'
+        query += ' join ' + db_label_order( '?' ) + ' as label_order on label_order.label = lead.label'
+        query += ' where relative.tester in (' + ','.join( ['?'] * len( group ) ) + ')'
+        query += ' and tester_value.dna between dna_range.min and dna_range.max'
+        query += ' group by relative.indi having count( distinct relative.tester ) = ?'
+        query += ' order by min( label_order.first ), min( lead.rowid )'
+        for row in db.execute( query, [group[0], group[0]] + list( group ) + [len( group )] ):
+            if row[0] not in results:
+               results.append( row[0] )
+    return results
+
+
+def main():
+    global readgedcom, i_key, f_key, data
+
+    options = get_program_options()
+
+    if not are_options_ok( options ):
+       sys.exit(1)
+
+    readgedcom = load_gedcom_library( options['libpath'] )
+
+    i_key = readgedcom.PARSED_INDI
+    f_key = readgedcom.PARSED_FAM
+
+    # With a database only the needed people are loaded into memory
+    # otherwise the whole file is read
+    database = None
+    if options['database'] is not None:
+       if options['refresh-database'] or not is_database_current( options['database'], options['infile'] ):
+          # only one copy rebuilds, the others wait for it
+          # or keep using the previous database if there is one
+          must_wait = options['refresh-database'] or not os.path.isfile( options['database'] )
+          lock = lock_database( options['database'], must_wait )
+          if lock is None:
+             print( 'Another run is rebuilding the database, using the previous one', file=sys.stderr )
+          else:
+             try:
+                # it might have been rebuilt while waiting
+                if options['refresh-database'] or not is_database_current( options['database'], options['infile'] ):
+                   data = read_gedcom( options['infile'] )
+                   import_database( options['database'], options['infile'], data[i_key], data[f_key] )
+             finally:
+                unlock_database( lock )
+       database = open_database( options['database'], DNA_RANGES )
+       data = { i_key:dict(), f_key:dict() }
+
+    else:
+       data = read_gedcom( options['infile'] )
+
+    if database:
+       individuals = db_find_candidates( database, options['id-item'], options['testers'] + (options['segments'] or []) )
+    else:
+       individuals = data[i_key]
+
+    tester_values = find_ids_of_testers( options['id-item'], options['testers'], individuals, str )
+    if len( tester_values ) != len( options['testers'] ):
+       # error messages have already been printed
+       sys.exit(1)
+
+    # each tester has a list of DNA values, with more than one only for a sweep,
+    # and the middle one is used where a single value is needed
+    testers = dict()
+    for indi in tester_values:
+        tester_values[indi] = get_dna_values( tester_values[indi], options['sweep-step'] )
+        testers[indi] = tester_values[indi][len( tester_values[indi] ) // 2]
+
+    if database:
+       db_load_people( database, testers, data )
+
+    tester_segments = dict()
+    if options['segments'] is not None:
+       segment_files = find_ids_of_testers( options['id-item'], options['segments'], individuals, str, 'Segments' )
+       if len( segment_files ) != len( options['segments'] ):
+          # error messages have already been printed
+          sys.exit(1)
+       for indi in segment_files:
+           if indi not in testers:
+              print( person_info(indi), 'has segments but is not one of the testers', file=sys.stderr )
+              sys.exit(1)
+           tester_segments[indi] = read_segments( segment_files[indi] )
+           if tester_segments[indi] is None:
+              sys.exit(1)
+
+    tester_groups = find_tester_groups( testers, tester_segments, options['min-testers'] )
+    if not tester_groups:
+       print( 'No segments are shared by at least', options['min-testers'], 'testers', file=sys.stderr )
+       sys.exit(1)
+
+    if tester_segments and options['show-each']:
+       for group in tester_groups:
+           print( 'Triangulated testers:', ', '.join( [person_info(indi) for indi in group] ), file=sys.stderr )
+       print( '', file=sys.stderr )
+
+    # There is a limit to the usefullness of low quality matches
+    # but this is a guess at this limit.
+    # Maybe a large number of low quality matches is ok.
+
+    biggest_dna = 0
+    for indi in testers:
+        biggest_dna = max( biggest_dna, max( tester_values[indi] ) )
+    if biggest_dna < options['smallest-match']:
+       print( 'At least one match must be greater than', options['smallest-match'], file=sys.stderr )
+       sys.exit(1)
+
+    if options['virtual-generations'] > 0:
+       n = add_virtual_generations( options['virtual-generations'], tester_values, DNA_RANGES, data[i_key], data[f_key] )
+       if options['show-each']:
+          print( 'Added', n, 'virtual people above the tree top', file=sys.stderr )
+          print( '', file=sys.stderr )
+
+    # everyone gets a list of all their ancestors
+
+    ancestor_fams = dict()
+    if database:
+       db_load_ancestor_families( database, testers, ancestor_fams )
+    else:
+       for indi in data[i_key]:
+           ancestor_fams[indi] = get_ancestor_families( indi, data[i_key], data[f_key] )
+
+    check_testers( testers, ancestor_fams, data[i_key], options['show-each'] )
+    if options['show-each']:
+       print( '', file=sys.stderr )
+
+    # everyone gets a list of all their blood relativs
+
+    blood_related = dict()
+    for indi in testers:
+        if database:
+           blood_related[indi] = db_find_blood_related( database, indi )
+        else:
+           blood_related[indi] = find_blood_related( indi, ancestor_fams, data[i_key] )
+
+    # setup relationships
+
+    for indi in testers:
+        for other in blood_related[indi]:
+            blood_related[indi][other]['label'] = find_relation_label( blood_related[indi][other] )
+
+    # the relationships don't depend on the DNA values, so group them once
+    # then look up each value against the ranges
+
+    relatives_by_label = dict()
+    for indi in testers:
+        relatives_by_label[indi] = group_by_relation( blood_related[indi] )
+
+    if options['sweep']:
+       if database:
+          for indi in testers:
+              db_load_people( database, blood_related[indi], data )
+       show_sweep( tester_values, tester_groups, relatives_by_label, DNA_RANGES )
+       sys.exit(0)
+
+    within_range = dict()
+
+    for indi in testers:
+        dna_value = testers[indi]
+        if database:
+           within_range[indi] = db_find_within_range( database, indi, dna_value )
+        else:
+           within_range[indi] = find_within_range( relatives_by_label[indi], dna_value, DNA_RANGES )
+
+        if options['show-each']:
+           if database:
+              db_load_people( database, within_range[indi], data )
+           print( person_info(indi), 'within range of', dna_value, 'cM', file=sys.stderr )
+           # shown in the order of the tree rather than grouped by relationship
+           in_range = set( within_range[indi] )
+           for other in blood_related[indi]:
+               if other in in_range:
+                  print( '   ', person_info(other), blood_related[indi][other]['label'], file=sys.stderr )
+           if not within_range[indi]:
+              print( 'No one', file=sys.stderr )
+           print( '', file=sys.stderr )
+
+    # add them together to find the potential common matches
+    # for each set of testers which might share a common ancestor
+    if database:
+       matches = db_intersect_groups( database, testers, tester_groups )
+       db_load_people( database, matches, data )
+    else:
+       matches = intersect_groups( within_range, tester_groups )
+
+    # of course the testers won't be in the matches because a person can't
+    # match with themselves
+
+    n_matches = len( matches )
+
+    print( 'The intersection of matches has', n_matches, 'people', file=sys.stderr )
+
+    # show the matches
+
+    for indi in matches:
+        print( '   ', person_info(indi), file=sys.stderr )
+
+    if n_matches < 1:
+       print( '', file=sys.stderr )
+       print( 'No one to draw. Exiting', file=sys.stderr )
+       sys.exit(1)
+
+    if n_matches >= options['max-results']:
+       print( '', file=sys.stderr )
+       print( 'Too many people to draw in a tree. Exiting', file=sys.stderr )
+       sys.exit(1)
+
+
+    # To draw the tree, connect people of interest to ancestor families
+    # and let the drawing program sort it out (Graphviz)
+    #
+    # But at some point, at the top of the tree, families doesn't connect to their ancestors.
+    # In order to know where to stop find the shared ancestor families
+    # who's partners don't have any shared sncestors from the people of interest.
+
+    # step 1: make the list of all families heading to the top
+
+    # the testers need to be included
+    for indi in testers:
+        matches.append( indi )
+
+    if database:
+       # bring in the families along the paths, and the ancestors of their partners
+       db_load_for_drawing( database, matches, data, ancestor_fams )
+
+    fams_along_paths = dict()
+    for indi in matches:
+        for ancestor_fam in ancestor_fams[indi]:
+            fams_along_paths[ancestor_fam] = True
+
+    # step 2: list all the shared families of all the people of interest
+
+    all_shared_fams = dict()
+    for indi in matches:
+        for them in matches:
+            relation = find_relation( indi, them, ancestor_fams, data[i_key] )
+            if relation is not None:
+               all_shared_fams[relation['closest']] = True
+
+    # step 3: individuals along the path who don't have a shared ancestor family
+    # The resulting list will be who from each family connects to their parents family.
+    # Aside from the persons of interest who will always connect to their parents.
+    # The from/to portion is a list because a person could have multiple "from" families
+
+    partner_to_parent = dict()
+    already_tested = []
+    for fam in fams_along_paths:
+        for partner in ['husb','wife']:
+            if partner in data[f_key][fam]:
+               partner_id = data[f_key][fam][partner][0]
+               for ancestor_fam in ancestor_fams[partner_id]:
+                   if ancestor_fam in all_shared_fams:
+                      parents = data[i_key][partner_id]['famc'][0]
+                      dup_test = str(fam) +':'+ str(parents)
+                      if dup_test in already_tested:
+                         continue
+                      already_tested.append( dup_test )
+                      if partner_id not in partner_to_parent:
+                         partner_to_parent[partner_id] = []
+                      partner_to_parent[partner_id].append( { 'from':fam, 'to':parents } )
+
+    # track people to parents, but only the ones in the path
+    # people at the top of the tree have no parents to link to
+    parent_link = dict()
+    for indi in matches:
+        parent_link[indi] = None
+        if 'famc' in data[i_key][indi]:
+           parent_link[indi] = data[i_key][indi]['famc'][0]
+
+    start_dot( make_label( data[i_key], testers ), options['thick'], options['orientation'] )
+    dot_labels( data[i_key], data[f_key], testers.keys(), parent_link, partner_to_parent )
+    dot_connect( options['reverse'], parent_link, partner_to_parent )
+    end_dot()
+
+
+if __name__ == '__main__':
+   main()